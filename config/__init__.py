@@ -0,0 +1,9 @@
+"""
+Configuration package for Social Media Data Collection
+(Used by data_collection_script.py and the platform collectors)
+
+Import the per-platform submodules (config.reddit, config.youtube,
+config.telegram) to pull in only what a collector needs.
+"""
+
+from .constants import *  # noqa: F401,F403
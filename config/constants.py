@@ -1,27 +1,38 @@
 """
-Configuration file for Social Media Data Collection
-(Used by reddit_collector.py, youtube_collector.py, and telegram_collector.py)
+Canonical configuration constants for Social Media Data Collection
+(Re-exported by config/__init__.py and the per-platform config submodules)
+
+Lists are exposed as tuples (ordered iteration) with a matching *_SET
+frozenset for membership tests; mappings are read-only.
 """
 
-from datetime import datetime
+import sys
+from types import MappingProxyType
+
+
+def _interned(*items):
+    """Intern every string so lookups can short-circuit on identity"""
+    return tuple(sys.intern(s) for s in items)
+
 
 # ==========================================================
 # 🟥 REDDIT CONFIGURATION
 # ==========================================================
 
 # Subreddits related to geopolitical and Middle East discussions
-SUBREDDITS = [
+SUBREDDITS = _interned(
     "Palestine",
     "Israel",
     "IsraelPalestine",
     "worldnews",
     "news",
     "MiddleEastNews",
-    "geopolitics"
-]
+    "geopolitics",
+)
+SUBREDDITS_SET = frozenset(SUBREDDITS)
 
 # Conflict-related keywords
-REDDIT_KEYWORDS = [
+REDDIT_KEYWORDS = _interned(
     "Palestine",
     "Gaza",
     "Israel",
@@ -30,8 +41,9 @@ REDDIT_KEYWORDS = [
     "West Bank",
     "Gaza Strip",
     "Israeli occupation",
-    "Middle East conflict"
-]
+    "Middle East conflict",
+)
+REDDIT_KEYWORDS_SET = frozenset(REDDIT_KEYWORDS)
 
 # Maximum posts to collect per subreddit
 MAX_POSTS_PER_SUB = 2000  # Increase for larger datasets
@@ -41,16 +53,18 @@ MAX_POSTS_PER_SUB = 2000  # Increase for larger datasets
 # ==========================================================
 
 # Channel IDs of major international news outlets
-YOUTUBE_CHANNELS = {
-    "BBC News": "UC16niRr50-MSBwiO3YDb3RA",
-    "Al Jazeera English": "UCNye-wNBqNL5ZzHSJj3l8Bg",
-    "CNN": "UCupvZG-5ko_eiXAupbDfxWw",
-    "Reuters": "UCZLZ8Jjx_RN2CXloOmgTHVg",
-    "WION": "UC_gUM8rL-Lrg6O3adPW9K1g"
-}
+YOUTUBE_CHANNELS = MappingProxyType({
+    sys.intern(name): sys.intern(cid) for name, cid in (
+        ("BBC News", "UC16niRr50-MSBwiO3YDb3RA"),
+        ("Al Jazeera English", "UCNye-wNBqNL5ZzHSJj3l8Bg"),
+        ("CNN", "UCupvZG-5ko_eiXAupbDfxWw"),
+        ("Reuters", "UCZLZ8Jjx_RN2CXloOmgTHVg"),
+        ("WION", "UC_gUM8rL-Lrg6O3adPW9K1g"),
+    )
+})
 
 # Keywords to filter YouTube videos
-YOUTUBE_KEYWORDS = [
+YOUTUBE_KEYWORDS = _interned(
     "Israel",
     "Palestine",
     "Gaza",
@@ -60,8 +74,9 @@ YOUTUBE_KEYWORDS = [
     "Conflict",
     "War",
     "Ceasefire",
-    "Jerusalem"
-]
+    "Jerusalem",
+)
+YOUTUBE_KEYWORDS_SET = frozenset(YOUTUBE_KEYWORDS)
 
 # Collection limits
 MAX_VIDEOS_PER_CHANNEL = 10   # Number of videos per channel
@@ -72,7 +87,7 @@ MAX_COMMENTS_PER_VIDEO = 500  # Number of comments per video
 # ==========================================================
 
 # Channels known to discuss or report on the Israel–Hamas conflict
-TELEGRAM_CHANNELS = [
+TELEGRAM_CHANNELS = _interned(
     "AlQassamBrigades",
     "Aqsatvsat",
     "Eyeonpalestine",
@@ -91,8 +106,9 @@ TELEGRAM_CHANNELS = [
     "palOnline",
     "palestineonline",
     "palestineresistance",
-    "resistancechain"
-]
+    "resistancechain",
+)
+TELEGRAM_CHANNELS_SET = frozenset(TELEGRAM_CHANNELS)
 
 # Maximum messages to collect per channel
 MAX_MESSAGES_PER_CHANNEL = 2000
@@ -113,5 +129,6 @@ TELEGRAM_OUTPUT_FILE = "telegram_israel_palestine"
 # 🕒 DATE RANGE (used for filtering or labeling during analysis)
 # ==========================================================
 
-START_DATE = datetime(2023, 10, 7)   # Conflict start date
-END_DATE = datetime(2025, 1, 20)     # Latest collection date
\ No newline at end of file
+# ISO dates (YYYY-MM-DD); parse with datetime.fromisoformat() where needed
+START_DATE = "2023-10-07"   # Conflict start date
+END_DATE = "2025-01-20"     # Latest collection date
\ No newline at end of file
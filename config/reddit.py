@@ -0,0 +1,12 @@
+"""
+Reddit configuration (see config/constants.py)
+"""
+
+from .constants import (  # noqa: F401
+    SUBREDDITS,
+    SUBREDDITS_SET,
+    REDDIT_KEYWORDS,
+    REDDIT_KEYWORDS_SET,
+    MAX_POSTS_PER_SUB,
+    REDDIT_OUTPUT_FILE,
+)
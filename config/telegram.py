@@ -0,0 +1,10 @@
+"""
+Telegram configuration (see config/constants.py)
+"""
+
+from .constants import (  # noqa: F401
+    TELEGRAM_CHANNELS,
+    TELEGRAM_CHANNELS_SET,
+    MAX_MESSAGES_PER_CHANNEL,
+    TELEGRAM_OUTPUT_FILE,
+)
@@ -0,0 +1,12 @@
+"""
+YouTube configuration (see config/constants.py)
+"""
+
+from .constants import (  # noqa: F401
+    YOUTUBE_CHANNELS,
+    YOUTUBE_KEYWORDS,
+    YOUTUBE_KEYWORDS_SET,
+    MAX_VIDEOS_PER_CHANNEL,
+    MAX_COMMENTS_PER_VIDEO,
+    YOUTUBE_OUTPUT_FILE,
+)
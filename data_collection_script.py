@@ -8,10 +8,144 @@ data collection scripts, following the methodology described in:
  - "Sentiment analysis of the Hamas–Israel war on YouTube comments using deep learning"
 """
 
+from __future__ import annotations
+
+import functools
+import hashlib
 import json
-from datetime import datetime
-from typing import List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from collections.abc import Mapping
+from typing import TYPE_CHECKING
 import os
+import sys
+
+from config.constants import (
+    SUBREDDITS as reddit_subreddits,
+    YOUTUBE_CHANNELS as youtube_channels,
+    TELEGRAM_CHANNELS as telegram_channels,
+)
+
+if TYPE_CHECKING:
+    from typing import List, Dict, Set, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: only needed for config_format="msgpack"
+    msgpack = None
+
+CONFIG_FORMATS = ("json", "msgpack")
+
+
+_SEP = "=" * 60
+
+# Output directories already created by this process
+_ENSURED_DIRS: Set[str] = set()
+
+
+def _emit(lines: List[str]):
+    """Write a block of status lines with a single stdout write"""
+    sys.stdout.write("\n".join(lines) + "\n")
+
+
+# -------------------------------
+# Config rendering (memoized)
+# -------------------------------
+REDDIT_FIELDS = (
+    "post_id", "subreddit", "author", "date", "title",
+    "text", "score", "num_comments", "upvote_ratio"
+)
+YOUTUBE_FIELDS = (
+    "video_id", "comment_id", "author", "text",
+    "published_at", "like_count", "reply_count", "channel_name"
+)
+TELEGRAM_FIELDS = (
+    "channel_name", "message_id", "date", "text",
+    "views", "forwards", "replies", "media"
+)
+
+
+class _Items(tuple):
+    """Hashable stand-in for a dict inside a memoization key"""
+
+
+def _freeze(value):
+    if isinstance(value, Mapping):
+        return _Items((k, _freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def _thaw(value):
+    if isinstance(value, _Items):
+        return {k: _thaw(v) for k, v in value}
+    if isinstance(value, tuple):
+        return [_thaw(v) for v in value]
+    return value
+
+
+def _build_config(platform: str, fields: Tuple[str, ...], extras: _Items) -> Dict:
+    config = {"platform": platform}
+    config.update(_thaw(extras))
+    config["fields_to_collect"] = list(fields)
+    return config
+
+
+def _encode(config: Dict, fmt: str = "json") -> bytes:
+    """
+    Serialize a config/report: pretty-printed, newline-terminated JSON,
+    or msgpack when fmt == "msgpack"
+    """
+    if fmt == "msgpack":
+        return msgpack.packb(config, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(config, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(config, indent=2) + "\n").encode("utf-8")
+
+
+@functools.lru_cache(maxsize=32)
+def _config_payload(platform: str, fields: Tuple[str, ...], extras: _Items,
+                    fmt: str = "json") -> bytes:
+    return _encode(_build_config(platform, fields, extras), fmt)
+
+
+def _replace_file(path: str, data: bytes):
+    """Write data to a temp file next to path, then atomically swap it in"""
+    tmp = f"{path}.tmp.{os.getpid()}"
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp, path)
+
+
+def _write_if_changed(path: str, payload: bytes) -> bool:
+    """
+    Write payload to path unless the .hash sidecar says it is already there.
+    Returns True if the file was (re)written.
+    """
+    digest = hashlib.blake2b(payload, digest_size=16).hexdigest()
+    sidecar = path + ".hash"
+
+    try:
+        os.stat(path)
+        with open(sidecar, "r", encoding="utf-8") as f:
+            if f.read().strip() == digest:
+                return False
+    except OSError:
+        pass
+
+    _replace_file(path, payload)
+    _replace_file(sidecar, digest.encode("ascii"))
+    return True
 
 
 class SocialMediaDataCollector:
@@ -19,9 +153,33 @@ class SocialMediaDataCollector:
     Config setup for social media data collection
     """
 
-    def __init__(self, output_dir: str = "collected_data"):
+    def __init__(self, output_dir: str = "collected_data", config_format: str = "json"):
+        if config_format not in CONFIG_FORMATS:
+            raise ValueError(f"config_format must be one of {CONFIG_FORMATS}, got {config_format!r}")
+        if config_format == "msgpack" and msgpack is None:
+            raise ImportError("config_format='msgpack' requires: pip install msgpack")
+
         self.output_dir = output_dir
-        os.makedirs(output_dir, exist_ok=True)
+        self.config_format = config_format
+        self._prefix = os.path.join(output_dir, "")
+        if output_dir not in _ENSURED_DIRS:
+            os.makedirs(output_dir, exist_ok=True)
+            _ENSURED_DIRS.add(output_dir)
+        # (label, path, payload) triples written together by flush()
+        self._pending: List[Tuple[str, str, bytes]] = []
+
+    # -------------------------------
+    # Shared config template
+    # -------------------------------
+    def _write_config(self, label: str, filename: str, platform: str,
+                      fields: Tuple[str, ...], **extras) -> Dict:
+        """
+        Render a platform config (memoized on its arguments) and queue it for flush()
+        """
+        frozen = _freeze(extras)
+        payload = _config_payload(platform, fields, frozen, self.config_format)
+        self._pending.append((label, f"{self._prefix}{filename}.{self.config_format}", payload))
+        return _build_config(platform, fields, frozen)
 
     # -------------------------------
     # Reddit Setup
@@ -33,40 +191,21 @@ class SocialMediaDataCollector:
         """
         Setup Reddit data collection configuration
         """
-        print("=" * 60)
-        print("REDDIT DATA COLLECTION SETUP")
-        print("=" * 60)
-
-        print("\nSubreddits to monitor:")
-        for i, s in enumerate(subreddits, 1):
-            print(f"{i}. r/{s}")
-
-        print("\nKeywords:")
-        for i, k in enumerate(keywords, 1):
-            print(f"{i}. {k}")
-
-        print(f"\nDate Range: {start_date} → {end_date}")
-        print(f"Max Posts: {max_posts}")
-
-        config = {
-            "platform": "reddit",
-            "subreddits": subreddits,
-            "keywords": keywords,
-            "start_date": start_date,
-            "end_date": end_date,
-            "max_posts": max_posts,
-            "fields_to_collect": [
-                "post_id", "subreddit", "author", "date", "title",
-                "text", "score", "num_comments", "upvote_ratio"
-            ]
-        }
-
-        path = os.path.join(self.output_dir, "reddit_config.json")
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2)
-
-        print(f"\n✓ Reddit configuration saved → {path}")
-        return config
+        lines = ["", _SEP, "REDDIT DATA COLLECTION SETUP", _SEP, "", "Subreddits to monitor:"]
+        lines.extend(f"{i}. r/{s}" for i, s in enumerate(subreddits, 1))
+        lines += ["", "Keywords:"]
+        lines.extend(f"{i}. {k}" for i, k in enumerate(keywords, 1))
+        lines += ["", f"Date Range: {start_date} → {end_date}", f"Max Posts: {max_posts}"]
+        _emit(lines)
+
+        return self._write_config(
+            "Reddit configuration", "reddit_config", "reddit", REDDIT_FIELDS,
+            subreddits=subreddits,
+            keywords=keywords,
+            start_date=start_date,
+            end_date=end_date,
+            max_posts=max_posts
+        )
 
     # -------------------------------
     # YouTube Setup
@@ -79,43 +218,27 @@ class SocialMediaDataCollector:
         """
         Setup YouTube data collection configuration
         """
-        print("\n" + "=" * 60)
-        print("YOUTUBE DATA COLLECTION SETUP")
-        print("=" * 60)
-
-        print("\nChannels to monitor:")
-        for i, (name, cid) in enumerate(channels.items(), 1):
-            print(f"{i}. {name} ({cid})")
-
-        print("\nKeywords:")
-        if keywords:
-            for i, k in enumerate(keywords, 1):
-                print(f"{i}. {k}")
-
-        print(f"\nDate Range: {start_date} → {end_date}")
-        print(f"Max Videos per Channel: {max_videos}")
-        print(f"Max Comments per Video: {max_comments}")
-
-        config = {
-            "platform": "youtube",
-            "channels": channels,
-            "keywords": keywords or [],
-            "start_date": start_date,
-            "end_date": end_date,
-            "max_videos_per_channel": max_videos,
-            "max_comments_per_video": max_comments,
-            "fields_to_collect": [
-                "video_id", "comment_id", "author", "text",
-                "published_at", "like_count", "reply_count", "channel_name"
-            ]
-        }
-
-        path = os.path.join(self.output_dir, "youtube_config.json")
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2)
-
-        print(f"\n✓ YouTube configuration saved → {path}")
-        return config
+        lines = ["", _SEP, "YOUTUBE DATA COLLECTION SETUP", _SEP, "", "Channels to monitor:"]
+        lines.extend(f"{i}. {name} ({cid})" for i, (name, cid) in enumerate(channels.items(), 1))
+        lines += ["", "Keywords:"]
+        lines.extend(f"{i}. {k}" for i, k in enumerate(keywords or (), 1))
+        lines += [
+            "",
+            f"Date Range: {start_date} → {end_date}",
+            f"Max Videos per Channel: {max_videos}",
+            f"Max Comments per Video: {max_comments}",
+        ]
+        _emit(lines)
+
+        return self._write_config(
+            "YouTube configuration", "youtube_config", "youtube", YOUTUBE_FIELDS,
+            channels=channels,
+            keywords=keywords or [],
+            start_date=start_date,
+            end_date=end_date,
+            max_videos_per_channel=max_videos,
+            max_comments_per_video=max_comments
+        )
 
     # -------------------------------
     # Telegram Setup
@@ -126,48 +249,39 @@ class SocialMediaDataCollector:
         """
         Setup Telegram data collection configuration
         """
-        print("\n" + "=" * 60)
-        print("TELEGRAM DATA COLLECTION SETUP")
-        print("=" * 60)
-
-        print("\nChannels to monitor:")
-        for i, ch in enumerate(channels, 1):
-            print(f"{i}. {ch}")
-
-        print(f"\nDate Range: {start_date} → {end_date}")
-        print(f"Max Messages per Channel: {max_messages}")
-        print("\nRequired Setup:")
-        print("1. Install: pip install telethon python-dotenv pandas")
-        print("2. Create .env file with TELEGRAM_API_ID, TELEGRAM_API_HASH, TELEGRAM_PHONE")
-
-        config = {
-            "platform": "telegram",
-            "channels": channels,
-            "start_date": start_date,
-            "end_date": end_date,
-            "max_messages_per_channel": max_messages,
-            "fields_to_collect": [
-                "channel_name", "message_id", "date", "text",
-                "views", "forwards", "replies", "media"
-            ]
-        }
-
-        path = os.path.join(self.output_dir, "telegram_config.json")
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(config, f, indent=2)
-
-        print(f"\n✓ Telegram configuration saved → {path}")
-        return config
+        lines = ["", _SEP, "TELEGRAM DATA COLLECTION SETUP", _SEP, "", "Channels to monitor:"]
+        lines.extend(f"{i}. {ch}" for i, ch in enumerate(channels, 1))
+        lines += [
+            "",
+            f"Date Range: {start_date} → {end_date}",
+            f"Max Messages per Channel: {max_messages}",
+            "",
+            "Required Setup:",
+            "1. Install: pip install telethon python-dotenv",
+            "2. Create .env file with TELEGRAM_API_ID, TELEGRAM_API_HASH, TELEGRAM_PHONE",
+        ]
+        _emit(lines)
+
+        return self._write_config(
+            "Telegram configuration", "telegram_config", "telegram", TELEGRAM_FIELDS,
+            channels=channels,
+            start_date=start_date,
+            end_date=end_date,
+            max_messages_per_channel=max_messages
+        )
 
     # -------------------------------
     # Summary Report
     # -------------------------------
     def create_summary_report(self, reddit_count: int, youtube_count: int, telegram_count: int):
         """
-        Create summary report for all three platforms
+        Create summary report for all three platforms, written together with
+        any configs still queued
         """
+        from datetime import datetime
+
         report = {
-            "collection_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "collection_date": datetime.now().isoformat(sep=" ", timespec="seconds"),
             "datasets": {
                 "reddit": {"total_posts": reddit_count, "platform": "Reddit"},
                 "youtube": {"total_comments": youtube_count, "platform": "YouTube"},
@@ -176,18 +290,37 @@ class SocialMediaDataCollector:
             "total_records": reddit_count + youtube_count + telegram_count
         }
 
-        path = os.path.join(self.output_dir, "collection_summary.json")
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(report, f, indent=2)
+        path = f"{self._prefix}collection_summary.{self.config_format}"
+        self._pending.append(("Summary", path, _encode(report, self.config_format)))
+
+        _emit([
+            "", _SEP, "DATA COLLECTION SUMMARY", _SEP,
+            f"Reddit Posts: {reddit_count:,}",
+            f"YouTube Comments: {youtube_count:,}",
+            f"Telegram Messages: {telegram_count:,}",
+            f"Total Records: {report['total_records']:,}",
+        ])
+        self.flush()
 
-        print("\n" + "=" * 60)
-        print("DATA COLLECTION SUMMARY")
-        print("=" * 60)
-        print(f"Reddit Posts: {reddit_count:,}")
-        print(f"YouTube Comments: {youtube_count:,}")
-        print(f"Telegram Messages: {telegram_count:,}")
-        print(f"Total Records: {report['total_records']:,}")
-        print(f"\n✓ Summary saved → {path}")
+    # -------------------------------
+    # Write queued files
+    # -------------------------------
+    def flush(self):
+        """
+        Write all queued configs/reports in parallel, then clear the queue
+        """
+        pending, self._pending = self._pending, []
+        if not pending:
+            return
+
+        with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+            written = list(pool.map(lambda item: _write_if_changed(item[1], item[2]), pending))
+
+        lines = [""]
+        for (label, path, _), changed in zip(pending, written):
+            status = "saved" if changed else "unchanged"
+            lines.append(f"✓ {label} {status} → {path}")
+        _emit(lines)
 
 
 # ============================================================
@@ -195,19 +328,13 @@ class SocialMediaDataCollector:
 # ============================================================
 
 def main():
-    print("=" * 60)
-    print("SOCIAL MEDIA DATA COLLECTION SETUP")
-    print("Platforms: Reddit + YouTube + Telegram")
-    print("=" * 60)
+    _emit([_SEP, "SOCIAL MEDIA DATA COLLECTION SETUP", "Platforms: Reddit + YouTube + Telegram", _SEP])
 
     collector = SocialMediaDataCollector()
 
     # ---------- Reddit ----------
-    reddit_config = collector.setup_reddit_collection(
-        subreddits=[
-            "Palestine", "Israel", "IsraelPalestine", "worldnews",
-            "news", "MiddleEastNews", "geopolitics"
-        ],
+    collector.setup_reddit_collection(
+        subreddits=reddit_subreddits,
         keywords=[
             "Palestine", "Gaza", "Israel", "Hamas",
             "IDF", "West Bank", "Gaza Strip", "Israeli occupation"
@@ -218,14 +345,8 @@ def main():
     )
 
     # ---------- YouTube ----------
-    youtube_config = collector.setup_youtube_collection(
-        channels={
-            "BBC": "UC16niRr50-MSBwiO3YDb3RA",
-            "Aljazeera": "UCNye-wNBqNL5ZzHSJj3l8Bg",
-            "CNN": "UCupvZG-5ko_eiXAupbDfxWw",
-            "WION": "UC_gUM8rL-Lrg6O3adPW9K1g",
-            "Reuters": "UCZLZ8Jjx_RN2CXloOmgTHVg"
-        },
+    collector.setup_youtube_collection(
+        channels=youtube_channels,
         keywords=["Israel", "Hamas", "Gaza", "Palestine", "conflict", "war"],
         start_date="2023-10-07",
         end_date="2025-01-20",
@@ -234,31 +355,25 @@ def main():
     )
 
     # ---------- Telegram ----------
-    telegram_channels = [
-        "AlQassamBrigades", "Aqsatvsat", "Eyeonpalestine", "FreePalestine2023",
-        "GazaNow", "PalestineSolidarityBelgium", "PalestineUpdates",
-        "PalestinianResistance", "StopGazaGenocide", "TIMESOFGAZA",
-        "TheJerusalemPost", "bigolivr", "gazaalanpa", "gazaenglishupdates",
-        "haqqintel", "palOnline", "palestineonline", "palestineresistance", "resistancechain"
-    ]
-
-    telegram_config = collector.setup_telegram_collection(
+    collector.setup_telegram_collection(
         channels=telegram_channels,
         start_date="2023-10-07",
         end_date="2025-01-20",
         max_messages=2000
     )
 
-    print("\n" + "=" * 60)
-    print("SETUP COMPLETE ✅")
-    print("=" * 60)
-    print("\nNext Steps:")
-    print("1. Review generated configs in 'collected_data/'")
-    print("2. Ensure API credentials in .env file")
-    print("3. Run respective collectors:")
-    print("   - reddit_collector.py")
-    print("   - youtube_collector.py")
-    print("   - telegram_collector.py")
+    collector.flush()
+
+    collectors = ("reddit_collector.py", "youtube_collector.py", "telegram_collector.py")
+    lines = [
+        "", _SEP, "SETUP COMPLETE ✅", _SEP,
+        "", "Next Steps:",
+        "1. Review generated configs in 'collected_data/'",
+        "2. Ensure API credentials in .env file",
+        "3. Run respective collectors:",
+    ]
+    lines.extend(f"   - {name}" for name in collectors)
+    _emit(lines)
 
 
 if __name__ == "__main__":
@@ -4,13 +4,103 @@ Reddit Data Collection via Reddit's Public JSON Endpoints
 Filtered by conflict-related keywords and date range
 """
 
-import requests
-import time
+import asyncio
+import httpx
 from datetime import datetime
-import json
-import pandas as pd
 import os
-from typing import List, Dict
+from typing import Iterable, List, Dict, Optional, Set
+
+from config.reddit import SUBREDDITS
+from storage import (PARQUET_AVAILABLE, JsonlWriter, read_json, read_jsonl,
+                     write_json_atomic, write_records)
+
+_BANNER = "=" * 60
+
+MAX_CONCURRENCY = 64        # In-flight requests to reddit.com
+MAX_RETRIES = 5             # Per page, on HTTP 429/5xx or network errors
+MIN_REQUEST_INTERVAL = 1.0  # Seconds between requests when Reddit sends no rate-limit headers
+
+
+class _RateLimiter:
+    """
+    Async request pacer driven by Reddit's X-Ratelimit-Remaining/-Reset headers
+    """
+
+    def __init__(self, min_interval: float = MIN_REQUEST_INTERVAL):
+        self.min_interval = min_interval
+        self.interval = min_interval
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            delay = self._next_at - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_at = loop.time() + self.interval
+
+    def update(self, headers):
+        try:
+            remaining = float(headers["X-Ratelimit-Remaining"])
+            reset = float(headers["X-Ratelimit-Reset"])
+        except (KeyError, ValueError):
+            return
+
+        if remaining < 1:
+            # Budget exhausted: hold everything until the window resets
+            self._next_at = asyncio.get_running_loop().time() + reset
+        else:
+            # Spread the remaining budget evenly over the rest of the window
+            self.interval = reset / remaining
+
+
+def _query_key(subreddits, max_posts_per_sub, start_timestamp, end_timestamp) -> List:
+    """
+    JSON-comparable identity of a search, so a checkpoint is only resumed by the same query
+    """
+    return [list(subreddits), max_posts_per_sub, start_timestamp, end_timestamp]
+
+
+class _SearchRun:
+    """
+    Shared state for one collect_posts() call, used by every keyword chain
+    """
+
+    def __init__(self, session: httpx.AsyncClient, subreddits: List[str],
+                 max_posts_per_sub: int, start_timestamp: Optional[int],
+                 end_timestamp: Optional[int], stream: Optional[JsonlWriter],
+                 posts: Optional[List[Dict]], total: int = 0,
+                 checkpoint_path: Optional[str] = None, checkpoint: Optional[Dict] = None):
+        self.session = session
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+        self.limiter = _RateLimiter()
+        self.collected = dict.fromkeys(subreddits, 0)
+        self.max_posts_per_sub = max_posts_per_sub
+        self.start_timestamp = start_timestamp
+        self.end_timestamp = end_timestamp
+        self.stream = stream
+        self.posts = posts  # None when streaming: records then live only in the JSONL
+        self.total = total
+
+        # Resume state: `after` cursor per unfinished keyword, and finished keywords
+        self.checkpoint_path = checkpoint_path
+        self.query = _query_key(subreddits, max_posts_per_sub, start_timestamp, end_timestamp)
+        self.cursors: Dict[str, str] = {}
+        self.done: Set[str] = set()
+        if checkpoint:
+            self.cursors.update(checkpoint["after"])
+            self.done.update(checkpoint["done"])
+            self.collected.update(checkpoint["collected"])
+
+    def save_checkpoint(self):
+        if self.checkpoint_path:
+            write_json_atomic(self.checkpoint_path, {
+                "query": self.query,
+                "after": self.cursors,
+                "done": sorted(self.done),
+                "collected": self.collected,
+            })
 
 
 class RedditCollector:
@@ -20,25 +110,166 @@ class RedditCollector:
 
     def __init__(self, output_dir: str = "collected_data"):
         self.output_dir = output_dir
+        self._prefix = os.path.join(output_dir, "")
         os.makedirs(output_dir, exist_ok=True)
         self.base_url = "https://www.reddit.com"
         self.headers = {"User-Agent": "Mozilla/5.0 (Reddit Data Collector)"}
+        self._seen_ids: Set[str] = set()  # post_ids already collected, across calls
         print("✓ Connected to Reddit public JSON endpoints")
 
-    def collect_posts(
+    async def _fetch_page(self, run: _SearchRun, url: str, params: Dict,
+                          label: str) -> Optional[Dict]:
+        """
+        GET one search page, retrying with exponential backoff on 429/5xx, network
+        errors, and 200 responses that aren't JSON (HTML block or captcha pages)
+        """
+        for attempt in range(MAX_RETRIES):
+            await run.limiter.wait()
+            try:
+                async with run.semaphore:
+                    response = await run.session.get(url, params=params)
+                run.limiter.update(response.headers)
+                if response.status_code == 200:
+                    return response.json().get("data", {})
+                if response.status_code != 429 and response.status_code < 500:
+                    print(f"⚠️ HTTP {response.status_code} for {label}")
+                    return None
+                print(f"⚠️ HTTP {response.status_code} for {label}, retrying...")
+            except (httpx.HTTPError, ValueError) as e:  # JSONDecodeError is a ValueError
+                print(f"⚠️ Error fetching {label}: {e!r}, retrying...")
+
+            await asyncio.sleep(2 ** attempt)
+
+        print(f"✗ Giving up on {label} after {MAX_RETRIES} attempts")
+        return None
+
+    async def _run_chain(self, run: _SearchRun, subreddits: List[str], keyword: str):
+        """
+        Run one keyword chain, containing any unexpected error to that keyword:
+        it is logged, its last cursor stays checkpointed, and the other chains carry on
+        """
+        try:
+            await self._collect_chain(run, subreddits, keyword)
+        except Exception as e:
+            print(f"✗ Error collecting {keyword}: {e!r}")
+
+    async def _collect_chain(self, run: _SearchRun, subreddits: List[str], keyword: str):
+        """
+        Follow the `after` cursor for one keyword across all subreddits at once
+        (r/a+b+c/search.json), bucketing results back into their subreddit.
+        The cursor is checkpointed after every page, so an interrupted chain
+        picks up where it left off.
+        """
+        if keyword in run.done:
+            return
+
+        url = f"{self.base_url}/r/{'+'.join(subreddits)}/search.json"
+        by_name = {s.lower(): s for s in subreddits}
+        params = {"q": keyword, "restrict_sr": "on", "sort": "new", "limit": "100"}
+        after = run.cursors.get(keyword)
+        reached_start = False
+
+        # Hoist per-run invariants out of the per-post loop
+        collected = run.collected
+        max_posts = run.max_posts_per_sub
+        start_ts = run.start_timestamp
+        end_ts = run.end_timestamp
+        seen = self._seen_ids
+        posts_out = run.posts
+        stream = run.stream
+
+        while any(collected[s] < max_posts for s in subreddits):
+            if after:
+                params["after"] = after
+
+            data = await self._fetch_page(run, url, params, keyword)
+            if data is None:
+                # Leave the cursor checkpointed so a rerun retries from here
+                return
+
+            posts = data.get("children", [])
+            if not posts:
+                break
+
+            for post in posts:
+                get = post["data"].get  # One bound method for all field lookups below
+                subreddit = by_name.get(str(get("subreddit", "")).lower())
+                if subreddit is None or collected[subreddit] >= max_posts:
+                    continue
+                collected[subreddit] += 1
+
+                created_utc = get("created_utc")
+
+                # ✅ Filter by date range
+                if start_ts and created_utc < start_ts:
+                    reached_start = True
+                    continue
+                if end_ts and created_utc > end_ts:
+                    continue
+
+                # Deduplicate on insert (the same post matches several keywords)
+                post_id = get("id")
+                if post_id in seen:
+                    continue
+                seen.add(post_id)
+
+                post_record = {
+                    "post_id": post_id,
+                    "subreddit": subreddit,
+                    "author": get("author"),
+                    "date": datetime.utcfromtimestamp(created_utc).isoformat(),
+                    "title": get("title", ""),
+                    "text": get("selftext", ""),
+                    "score": get("score", 0),
+                    "num_comments": get("num_comments", 0),
+                    "upvote_ratio": get("upvote_ratio"),
+                    "url": f"https://reddit.com{get('permalink', '')}",
+                    "keyword": keyword
+                }
+                run.total += 1
+                if posts_out is not None:
+                    posts_out.append(post_record)
+                if stream is not None:
+                    stream.write(post_record)
+
+            if stream is not None:
+                stream.flush()
+            print(f"  {keyword}: Collected {sum(collected.values())} posts so far...")
+            after = data.get("after")
+
+            # Results are sorted newest-first, so every later page predates start_date
+            if not after or reached_start:
+                break
+            run.cursors[keyword] = after
+            run.save_checkpoint()
+
+        run.cursors.pop(keyword, None)
+        run.done.add(keyword)
+        run.save_checkpoint()
+
+    async def collect_posts(
         self,
         subreddits: List[str],
         keywords: List[str],
         max_posts_per_sub: int = 500,
         start_date: str = None,
-        end_date: str = None
-    ) -> List[Dict]:
+        end_date: str = None,
+        stream_filename: str = None
+    ) -> Iterable[Dict]:
         """
         Collect posts from multiple subreddits using Reddit's JSON endpoints (no API keys)
         Filters by conflict-related keywords and optional date range.
+        Each keyword is searched across all subreddits in one multi-subreddit query;
+        the keyword searches run concurrently over one pooled HTTP/2 client, paced by
+        Reddit's rate-limit headers. Returns the posts as a list, or, if
+        stream_filename is given, writes them only to
+        <output_dir>/<stream_filename>.jsonl as each page arrives (constant memory)
+        and returns a lazy reader over that file. When streaming, each keyword's
+        `after` cursor is checkpointed to <output_dir>/<stream_filename>.checkpoint.json;
+        rerunning the same query after an interruption reloads the seen post ids
+        from the JSONL and resumes from those cursors. The checkpoint is removed
+        once every keyword has finished.
         """
-        all_posts = []
-
         # Convert dates to timestamps
         start_timestamp = (
             int(datetime.strptime(start_date, "%Y-%m-%d").timestamp()) if start_date else None
@@ -47,122 +278,88 @@ class RedditCollector:
             int(datetime.strptime(end_date, "%Y-%m-%d").timestamp()) if end_date else None
         )
 
+        print(f"\nCollecting from {', '.join(f'r/{s}' for s in subreddits)}...")
+        limits = httpx.Limits(max_connections=MAX_CONCURRENCY)
+
+        posts: Optional[List[Dict]] = []
+        total = 0
+        stream = checkpoint_path = checkpoint = None
+        if stream_filename:
+            posts = None
+            stream_path = f"{self._prefix}{stream_filename}.jsonl"
+            checkpoint_path = f"{self._prefix}{stream_filename}.checkpoint.json"
+            checkpoint = read_json(checkpoint_path)
+            query = _query_key(subreddits, max_posts_per_sub, start_timestamp, end_timestamp)
+            if checkpoint is not None and (checkpoint.get("query") != query
+                                           or not os.path.exists(stream_path)):
+                checkpoint = None
+
+            if checkpoint is not None:
+                seen = self._seen_ids
+                for record in read_jsonl(stream_path):
+                    seen.add(record["post_id"])
+                    total += 1
+                print(f"↻ Resuming from checkpoint with {total} posts already collected")
+            stream = JsonlWriter(stream_path, append=checkpoint is not None)
+
+        try:
+            async with httpx.AsyncClient(http2=True, headers=self.headers, timeout=30,
+                                         limits=limits) as session:
+                run = _SearchRun(session, subreddits, max_posts_per_sub,
+                                 start_timestamp, end_timestamp, stream, posts, total,
+                                 checkpoint_path, checkpoint)
+                await asyncio.gather(*(
+                    self._run_chain(run, subreddits, keyword) for keyword in keywords
+                ))
+        finally:
+            if stream is not None:
+                stream.close()
+
+        if checkpoint_path and run.done.issuperset(keywords) and os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
         for subreddit in subreddits:
-            print(f"\nCollecting from r/{subreddit}...")
-            collected = 0
-
-            for keyword in keywords:
-                after = None
-                while collected < max_posts_per_sub:
-                    url = f"{self.base_url}/r/{subreddit}/search.json"
-                    params = {
-                        "q": keyword,
-                        "restrict_sr": "on",
-                        "sort": "new",
-                        "limit": "100",
-                        "after": after
-                    }
-
-                    try:
-                        response = requests.get(url, headers=self.headers, params=params, timeout=30)
-                        if response.status_code != 200:
-                            print(f"⚠️ HTTP {response.status_code} for {subreddit} - {keyword}")
-                            break
-
-                        data = response.json().get("data", {})
-                        posts = data.get("children", [])
-                        if not posts:
-                            break
-
-                        for post in posts:
-                            post_data = post["data"]
-                            created_utc = post_data.get("created_utc")
-
-                            # ✅ Filter by date range
-                            if start_timestamp and created_utc < start_timestamp:
-                                continue
-                            if end_timestamp and created_utc > end_timestamp:
-                                continue
-
-                            post_record = {
-                                "post_id": post_data.get("id"),
-                                "subreddit": subreddit,
-                                "author": post_data.get("author"),
-                                "date": datetime.utcfromtimestamp(created_utc).isoformat(),
-                                "title": post_data.get("title", ""),
-                                "text": post_data.get("selftext", ""),
-                                "score": post_data.get("score", 0),
-                                "num_comments": post_data.get("num_comments", 0),
-                                "upvote_ratio": post_data.get("upvote_ratio"),
-                                "url": f"https://reddit.com{post_data.get('permalink', '')}",
-                                "keyword": keyword
-                            }
-                            all_posts.append(post_record)
-
-                        collected += len(posts)
-                        print(f"  {keyword}: Collected {collected} posts so far...")
-                        after = data.get("after")
-
-                        if not after:
-                            break
-
-                        time.sleep(1)  # Avoid hitting rate limits
-
-                    except Exception as e:
-                        print(f"✗ Error collecting {subreddit}/{keyword}: {e}")
-                        time.sleep(5)
-                        break
-
-            print(f"✓ Finished r/{subreddit} — total {collected} posts")
-
-        # Deduplicate by post_id
-        unique_posts = {p["post_id"]: p for p in all_posts}
-        all_posts = list(unique_posts.values())
-
-        print(f"\n✓ Total unique posts collected: {len(all_posts)}")
-        return all_posts
-
-    def save_data(self, posts: List[Dict], filename: str = None):
+            print(f"✓ Finished r/{subreddit} — total {run.collected[subreddit]} posts")
+
+        print(f"\n✓ Total unique posts collected: {run.total}")
+        if stream is not None:
+            return read_jsonl(stream.path)
+        return run.posts
+
+    def save_data(self, posts: Iterable[Dict], filename: str = None,
+                  also_write_text: bool = True, compress: bool = False):
         """
-        Save collected posts to JSON and CSV
+        Save collected posts to JSON and CSV, plus Parquet when pyarrow is installed
+        (streamed, so any iterable works). With also_write_text=False only the
+        Parquet file is written, which requires pyarrow; compress=True gzips the
+        JSON to <filename>.json.gz.
         """
         if not filename:
             filename = f"reddit_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
-        json_path = os.path.join(self.output_dir, f"{filename}.json")
-        csv_path = os.path.join(self.output_dir, f"{filename}.csv")
-
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(posts, f, indent=2, ensure_ascii=False)
+        base = self._prefix + filename
+        json_path = (base + (".json.gz" if compress else ".json")) if also_write_text else None
+        csv_path = base + ".csv" if also_write_text else None
+        parquet_path = base + ".parquet" if PARQUET_AVAILABLE or not also_write_text else None
 
-        pd.DataFrame(posts).to_csv(csv_path, index=False, encoding="utf-8")
+        total = write_records(posts, json_path, csv_path, parquet_path)
 
-        print(f"\n✓ Data saved:")
-        print(f"  JSON → {json_path}")
-        print(f"  CSV  → {csv_path}")
-        print(f"  Total posts: {len(posts)}")
+        print("\n✓ Data saved:")
+        if also_write_text:
+            print(f"  JSON → {json_path}\n  CSV  → {csv_path}")
+        if parquet_path and os.path.exists(parquet_path):
+            print(f"  Parquet → {parquet_path}")
+        print(f"  Total posts: {total}")
 
 
 def main():
     """
     Main execution
     """
-    print("=" * 60)
-    print("REDDIT DATA COLLECTION (Keyword + Date Filter)")
-    print("=" * 60)
+    print(f"{_BANNER}\nREDDIT DATA COLLECTION (Keyword + Date Filter)\n{_BANNER}")
 
     collector = RedditCollector()
 
-    SUBREDDITS = [
-        "Palestine",
-        "Israel",
-        "IsraelPalestine",
-        "worldnews",
-        "news",
-        "MiddleEastNews",
-        "geopolitics"
-    ]
-
     KEYWORDS = [
         "Palestine", "Gaza", "Israel", "Hamas",
         "IDF", "West Bank", "Gaza Strip", "Israeli occupation"
@@ -172,19 +369,22 @@ def main():
     START_DATE = "2023-10-07"
     END_DATE = "2025-01-20"
 
-    posts = collector.collect_posts(
+    FILENAME = "reddit_israel_palestine"
+
+    asyncio.run(collector.collect_posts(
         SUBREDDITS,
         KEYWORDS,
         max_posts_per_sub=2000,
         start_date=START_DATE,
-        end_date=END_DATE
-    )
+        end_date=END_DATE,
+        stream_filename=FILENAME
+    ))
 
-    collector.save_data(posts, filename="reddit_israel_palestine")
+    # Save from the JSONL just streamed, so the corpus is never held in memory
+    collector.save_data(read_jsonl(os.path.join(collector.output_dir, f"{FILENAME}.jsonl")),
+                        filename=FILENAME)
 
-    print("\n" + "=" * 60)
-    print("COLLECTION COMPLETE")
-    print("=" * 60)
+    print(f"\n{_BANNER}\nCOLLECTION COMPLETE\n{_BANNER}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,308 @@
+"""
+Shared output helpers for the Reddit, YouTube, and Telegram collectors
+Streams collected records to JSON, CSV, and JSON Lines through 64 KiB buffered writers,
+plus zstd-compressed Parquet when pyarrow is installed
+"""
+
+import io
+import json
+import os
+from contextlib import ExitStack
+from operator import itemgetter
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # Optional: fall back to the stdlib encoder
+    orjson = None
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # Optional: only needed for Parquet output
+    pyarrow = None
+
+BUFFER_SIZE = 64 * 1024
+PARQUET_AVAILABLE = pyarrow is not None
+PARQUET_BATCH_ROWS = 10_000  # Rows per Parquet row group, bounds memory while streaming
+PARQUET_COMPRESSION = "zstd"
+PARQUET_COMPRESSION_LEVEL = 3  # Near-max ratio at a fraction of the CPU of higher levels
+GZIP_LEVEL = 3  # For .json.gz output; most of level 9's ratio at ~3x the throughput
+
+
+def _dumps(obj) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def loads_json(data: bytes):
+    """
+    Parse JSON bytes with orjson when available, else the stdlib parser
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def write_json_atomic(path: str, obj):
+    """
+    Write obj as JSON to a temp file and swap it in with os.replace,
+    so readers never see a half-written file
+    """
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(_dumps(obj))
+    os.replace(tmp, path)
+
+
+def read_json(path: str):
+    """
+    Load a JSON file, or return None if it does not exist
+    """
+    try:
+        with open(path, "rb") as f:
+            return loads_json(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def read_jsonl(path: str) -> Iterator[Dict]:
+    """
+    Yield the records of a JSON Lines file, ignoring a trailing partial line
+    left by an interrupted writer
+    """
+    with open(path, "rb", buffering=BUFFER_SIZE) as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            yield loads_json(line)
+
+
+class JsonlWriter:
+    """
+    Write records to a JSON Lines file as they are collected, one object per line
+    """
+
+    def __init__(self, path: str, append: bool = False):
+        self.path = path
+        if append:
+            _trim_partial_line(path)
+        self._file = open(path, "ab" if append else "wb", buffering=BUFFER_SIZE)
+
+    def write(self, record: Dict):
+        self._file.write(_dumps(record))
+        self._file.write(b"\n")
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _trim_partial_line(path: str):
+    """
+    Cut an unterminated last line off a JSON Lines file before appending to it
+    """
+    try:
+        f = open(path, "r+b")
+    except FileNotFoundError:
+        return
+    with f:
+        size = f.seek(0, os.SEEK_END)
+        pos = size
+        while pos > 0:
+            start = max(0, pos - BUFFER_SIZE)
+            f.seek(start)
+            chunk = f.read(pos - start)
+            newline = chunk.rfind(b"\n")
+            if newline != -1:
+                pos = start + newline + 1
+                break
+            pos = start
+        if pos != size:
+            f.truncate(pos)
+
+
+def _row_getter(fieldnames):
+    get = itemgetter(*fieldnames)
+    if len(fieldnames) == 1:
+        return lambda record: (get(record),)
+    return get
+
+
+class _ParquetSink:
+    """
+    Buffer records into row groups of PARQUET_BATCH_ROWS and append them to a
+    zstd-compressed Parquet file; the schema is inferred from the first row group.
+    Columns that are entirely null there are written as strings (later values are
+    str()-ed), since a null-typed column could not hold values from later groups;
+    a later value that doesn't fit its column's type is an error, never truncated.
+    A failure is kept in .error and stops further writes instead of raising, so
+    the other outputs of write_records still complete.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.error: Optional[Exception] = None
+        self._batch = []
+        self._writer = None
+        self._stringified = frozenset()
+
+    def write(self, record: Dict):
+        if self.error is not None:
+            return
+        self._batch.append(record)
+        if len(self._batch) >= PARQUET_BATCH_ROWS:
+            self._flush_batch()
+
+    def _flush_batch(self):
+        batch, self._batch = self._batch, []
+        if not batch or self.error is not None:
+            return
+        try:
+            self._write_table(batch)
+        except Exception as e:
+            self.error = e
+
+    def _write_table(self, batch):
+        if self._writer is None:
+            table = pyarrow.Table.from_pylist(batch)
+            schema = table.schema
+            nulls = [i for i, field in enumerate(schema) if pyarrow.types.is_null(field.type)]
+            for i in nulls:
+                schema = schema.set(i, schema.field(i).with_type(pyarrow.string()))
+            self._stringified = frozenset(schema.field(i).name for i in nulls)
+            table = table.cast(schema)
+            self._writer = pyarrow.parquet.ParquetWriter(
+                self.path, schema,
+                compression=PARQUET_COMPRESSION, compression_level=PARQUET_COMPRESSION_LEVEL
+            )
+        else:
+            if self._stringified:
+                batch = [_stringify(record, self._stringified) for record in batch]
+            # Infer this group on its own, then cast safely: a value that doesn't fit
+            # the pinned type (e.g. 0.5 in an int64 column) raises instead of truncating
+            table = pyarrow.Table.from_pylist(batch)
+            schema = self._writer.schema
+            table = pyarrow.Table.from_arrays([
+                table.column(name).cast(field.type) if name in table.column_names
+                else pyarrow.nulls(len(table), field.type)
+                for name, field in zip(schema.names, schema)
+            ], schema=schema)
+        self._writer.write_table(table)
+
+    def close(self):
+        self._flush_batch()
+        if self._writer is not None:
+            try:
+                self._writer.close()
+            except Exception as e:
+                self.error = self.error or e
+
+
+def _stringify(record: Dict, names) -> Dict:
+    record = dict(record)
+    for name in names:
+        value = record.get(name)
+        if value is not None and not isinstance(value, str):
+            record[name] = str(value)
+    return record
+
+
+def write_records(records: Iterable[Dict], json_path: Optional[str], csv_path: Optional[str],
+                  parquet_path: Optional[str] = None) -> int:
+    """
+    Stream records to a JSON array, a CSV file, and optionally a Parquet file
+    (requires pyarrow) in a single pass; pass None for any output to skip it.
+    The CSV header is taken from the first record; later records are projected
+    onto it with a single itemgetter call per row. A json_path ending in ".gz"
+    is gzip-compressed at GZIP_LEVEL. Parquet is zstd-compressed and written
+    in PARQUET_BATCH_ROWS row groups. All files are written to temp
+    paths and swapped in with os.replace once complete, so an interrupted run
+    never leaves a truncated file behind. Parquet is a side output: with no
+    records it is skipped, and if it fails alongside JSON/CSV the error is
+    printed and the text outputs are still swapped in (it only raises when
+    Parquet is the sole output). Either way any stale Parquet file at
+    parquet_path is removed, so it never sits beside newer JSON/CSV.
+    Returns the record count.
+    """
+    if parquet_path is not None and pyarrow is None:
+        raise ImportError("Parquet output requires: pip install pyarrow")
+
+    paths = (json_path, csv_path, parquet_path)
+    tmps = [f"{p}.tmp.{os.getpid()}" if p is not None else None for p in paths]
+    try:
+        count, parquet_error = _stream(records, *tmps,
+                                       gzip_json=json_path is not None and json_path.endswith(".gz"))
+    except BaseException:
+        for tmp in tmps:
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
+        raise
+
+    if parquet_path is not None and (parquet_error is not None or not os.path.exists(tmps[2])):
+        # No Parquet this run (no records, or it failed)
+        for stale in (tmps[2], parquet_path):
+            if os.path.exists(stale):
+                os.remove(stale)
+        paths = (json_path, csv_path, None)
+        if parquet_error is not None:
+            if json_path is None and csv_path is None:
+                raise parquet_error
+            print(f"⚠️ Parquet output skipped: {parquet_error!r}")
+    for tmp, path in zip(tmps, paths):
+        if path is not None:
+            os.replace(tmp, path)
+    return count
+
+
+def _stream(records: Iterable[Dict], json_path: Optional[str], csv_path: Optional[str],
+            parquet_path: Optional[str], gzip_json: bool = False) -> Tuple[int, Optional[Exception]]:
+    count = 0
+    with ExitStack() as stack:
+        json_out = writer = parquet = row_of = None
+        if json_path is not None:
+            if gzip_json:
+                import gzip
+                raw = stack.enter_context(gzip.open(json_path, "wb", compresslevel=GZIP_LEVEL))
+                json_out = stack.enter_context(io.BufferedWriter(raw, buffer_size=BUFFER_SIZE))
+            else:
+                json_out = stack.enter_context(open(json_path, "wb", buffering=BUFFER_SIZE))
+            json_out.write(b"[")
+        if csv_path is not None:
+            import csv
+            csv_out = stack.enter_context(
+                open(csv_path, "w", encoding="utf-8", newline="", buffering=BUFFER_SIZE)
+            )
+            writer = csv.writer(csv_out)
+        if parquet_path is not None:
+            parquet = _ParquetSink(parquet_path)
+            stack.callback(parquet.close)
+
+        for record in records:
+            if json_out is not None:
+                if count:
+                    json_out.write(b",")
+                json_out.write(_dumps(record))
+            if writer is not None:
+                if row_of is None:
+                    fieldnames = list(record.keys())
+                    writer.writerow(fieldnames)
+                    row_of = _row_getter(fieldnames)
+                writer.writerow(row_of(record))
+            if parquet is not None:
+                parquet.write(record)
+            count += 1
+
+        if json_out is not None:
+            json_out.write(b"]")
+
+    return count, parquet.error if parquet is not None else None
@@ -3,13 +3,19 @@ Telegram Data Collection Script (with Date Filter and Message Limit)
 Reads credentials from .env file
 """
 
+import asyncio
 import os
-import json
-import pandas as pd
 from datetime import datetime, timezone
-from telethon.sync import TelegramClient
+from telethon import TelegramClient, utils
+from telethon.errors import FloodWaitError
+from telethon.extensions import markdown
+from telethon.tl.functions.messages import GetHistoryRequest
+from telethon.tl.types import InputPeerChannel, InputPeerChat, InputPeerUser
 from dotenv import load_dotenv
 
+from config.telegram import TELEGRAM_CHANNELS
+from storage import PARQUET_AVAILABLE, read_json, write_json_atomic, write_records
+
 # Load environment variables
 load_dotenv()
 
@@ -18,106 +24,182 @@ API_HASH = os.getenv("TELEGRAM_API_HASH")
 PHONE = os.getenv("TELEGRAM_PHONE")
 
 # Channels to collect from
-CHANNELS = [
-    "AlQassamBrigades",
-    "Aqsatvsat",
-    "Eyeonpalestine",
-    "FreePalestine2023",
-    "GazaNow",
-    "PalestineSolidarityBelgium",
-    "PalestineUpdates",
-    "PalestinianResistance",
-    "StopGazaGenocide",
-    "TIMESOFGAZA",
-    "TheJerusalemPost",
-    "bigolivr",
-    "gazaalanpa",
-    "gazaenglishupdates",
-    "haqqintel",
-    "palOnline",
-    "palestineonline",
-    "palestineresistance",
-    "resistancechain"
-]
+CHANNELS = TELEGRAM_CHANNELS
 
 OUTPUT_DIR = "collected_data"
 os.makedirs(OUTPUT_DIR, exist_ok=True)
+# Holds account-specific access hashes, so it lives beside the session, not in OUTPUT_DIR
+ENTITY_CACHE_PATH = "telegram_entity_cache.json"
 
 START_DATE = datetime(2023, 10, 7, tzinfo=timezone.utc)
 END_DATE = datetime(2025, 1, 20, tzinfo=timezone.utc)
 MESSAGE_LIMIT = 3000  # per channel
+HISTORY_BATCH = 100  # Messages per GetHistoryRequest, the server maximum
+MAX_CONCURRENT_CHANNELS = 4  # Keep low to stay clear of FLOOD_WAIT
+MAX_FLOOD_RETRIES = 3
+
+_BANNER = "=" * 60
+
+# channel username -> input peer as TLObject.to_dict() (e.g. {"_": "InputPeerChannel",
+# "channel_id": ..., "access_hash": ...}), persisted to ENTITY_CACHE_PATH
+_ENTITY_CACHE = {}
+_PEER_TYPES = {cls.__name__: cls for cls in (InputPeerChannel, InputPeerChat, InputPeerUser)}
+
+
+async def _resolve_channel(client, channel):
+    """
+    Return the input peer (channel, basic chat, or user) for a username,
+    resolving it over the network only when it is not already in the entity cache
+    """
+    cached = _ENTITY_CACHE.get(channel)
+    if isinstance(cached, dict) and cached.get("_") in _PEER_TYPES:
+        fields = dict(cached)
+        return _PEER_TYPES[fields.pop("_")](**fields)
+    peer = utils.get_input_peer(await client.get_entity(channel))
+    _ENTITY_CACHE[channel] = peer.to_dict()
+    return peer
+
 
-def collect_channel_messages(client, channel, start_date, end_date, limit):
+async def collect_channel_messages(client, channel, start_date, end_date, limit):
     """
     Collect messages from a Telegram channel within date range
     """
     messages = []
     try:
-        entity = client.get_entity(channel)
+        entity = await _resolve_channel(client, channel)
         count = 0
-
-        for i, msg in enumerate(client.iter_messages(entity, limit=limit)):
-            if msg.date is None:
-                continue
-            if msg.date.replace(tzinfo=timezone.utc) < start_date:
+        fetched = 0
+
+        # Page with raw GetHistoryRequest calls of HISTORY_BATCH messages each.
+        # offset_date starts the server-side cursor at end_date and walks
+        # backwards, so nothing newer than the window is ever fetched.
+        offset_id = 0
+        offset_date = end_date
+        while fetched < limit:
+            history = await client(GetHistoryRequest(
+                peer=entity,
+                offset_id=offset_id,
+                offset_date=offset_date,
+                add_offset=0,
+                limit=min(HISTORY_BATCH, limit - fetched),
+                max_id=0,
+                min_id=0,
+                hash=0
+            ))
+            batch = history.messages
+            if not batch:
                 break
-            if msg.date.replace(tzinfo=timezone.utc) > end_date:
-                continue
-
-            messages.append({
-                "channel_name": channel,
-                "message_id": msg.id,
-                "date": msg.date.isoformat(),
-                "text": msg.text or "",
-                "views": msg.views,
-                "forwards": msg.forwards,
-                "replies": msg.replies.replies if msg.replies else 0,
-                "media": bool(msg.media)
-            })
-
-            count += 1
-            if count % 500 == 0:
-                print(f"  ...processed {count} messages from {channel}")
+            fetched += len(batch)
+
+            reached_start = False
+            for msg in batch:
+                # Raw TL objects: service messages lack views/forwards/text
+                date = getattr(msg, "date", None)
+                if date is None:
+                    continue
+                if date < start_date:
+                    reached_start = True
+                    break
+
+                replies = getattr(msg, "replies", None)
+                messages.append({
+                    "channel_name": channel,
+                    "message_id": msg.id,
+                    "date": date.isoformat(),
+                    "text": markdown.unparse(getattr(msg, "message", None) or "",
+                                             getattr(msg, "entities", None)),
+                    "views": getattr(msg, "views", None),
+                    "forwards": getattr(msg, "forwards", None),
+                    "replies": replies.replies if replies else 0,
+                    "media": bool(getattr(msg, "media", None))
+                })
+
+                count += 1
+                if count % 500 == 0:
+                    print(f"  ...processed {count} messages from {channel}")
+
+            if reached_start:
+                break
+            offset_id = batch[-1].id
+            offset_date = getattr(batch[-1], "date", None)
 
         print(f"  ✓ Collected {len(messages)} messages from {channel}")
 
+    except FloodWaitError:
+        raise
     except Exception as e:
+        # Drop the cached peer in case its access_hash went stale
+        _ENTITY_CACHE.pop(channel, None)
         print(f"✗ Error collecting from {channel}: {e}")
 
     return messages
 
 
-def main():
-    print("=" * 60)
-    print("TELEGRAM DATA COLLECTION (Date Filter + Limit Enabled)")
-    print("=" * 60)
+async def _collect_with_sem(client, channel, semaphore, start_date, end_date, limit):
+    """
+    Collect one channel under the shared semaphore, sleeping out FLOOD_WAIT errors
+    """
+    async with semaphore:
+        for attempt in range(MAX_FLOOD_RETRIES + 1):
+            print(f"📢 Collecting from: {channel}")
+            try:
+                return await collect_channel_messages(client, channel, start_date, end_date, limit)
+            except FloodWaitError as e:
+                if attempt == MAX_FLOOD_RETRIES:
+                    break
+                print(f"⚠️ FLOOD_WAIT on {channel}, sleeping {e.seconds}s...")
+                await asyncio.sleep(e.seconds)
+
+    print(f"✗ Giving up on {channel} after {MAX_FLOOD_RETRIES} FLOOD_WAIT retries")
+    return []
 
-    with TelegramClient("telegram_session", API_ID, API_HASH) as client:
-        client.start(phone=PHONE)
+
+async def collect_from_channels(client, channels, start_date, end_date, limit):
+    """
+    Collect all channels concurrently over one client connection,
+    at most MAX_CONCURRENT_CHANNELS at a time
+    """
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_CHANNELS)
+    results = await asyncio.gather(*(
+        _collect_with_sem(client, channel, semaphore, start_date, end_date, limit)
+        for channel in channels
+    ))
+    # Flatten in channel order
+    return [msg for channel_msgs in results for msg in channel_msgs]
+
+
+async def run():
+    print(f"{_BANNER}\nTELEGRAM DATA COLLECTION (Date Filter + Limit Enabled)\n{_BANNER}")
+
+    async with TelegramClient("telegram_session", API_ID, API_HASH) as client:
+        await client.start(phone=PHONE)
         print("✓ Connected to Telegram API\n")
         print(f"Collecting messages between {START_DATE.date()} and {END_DATE.date()} from {len(CHANNELS)} channels...\n")
 
-        all_messages = []
-        for channel in CHANNELS:
-            print(f"📢 Collecting from: {channel}")
-            channel_msgs = collect_channel_messages(client, channel, START_DATE, END_DATE, MESSAGE_LIMIT)
-            all_messages.extend(channel_msgs)
+        _ENTITY_CACHE.update(read_json(ENTITY_CACHE_PATH) or {})
+        cached_before = dict(_ENTITY_CACHE)
+        all_messages = await collect_from_channels(client, CHANNELS, START_DATE, END_DATE, MESSAGE_LIMIT)
+        if _ENTITY_CACHE != cached_before:
+            write_json_atomic(ENTITY_CACHE_PATH, _ENTITY_CACHE)
 
         # Save results
-        json_path = os.path.join(OUTPUT_DIR, "telegram_israel_palestine.json")
-        csv_path = os.path.join(OUTPUT_DIR, "telegram_israel_palestine.csv")
+        base = os.path.join(OUTPUT_DIR, "telegram_israel_palestine")
+        json_path = base + ".json"
+        csv_path = base + ".csv"
+        parquet_path = base + ".parquet" if PARQUET_AVAILABLE else None
 
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(all_messages, f, ensure_ascii=False, indent=2)
+        write_records(all_messages, json_path, csv_path, parquet_path)
 
-        pd.DataFrame(all_messages).to_csv(csv_path, index=False, encoding="utf-8")
+        parquet_line = f"  Parquet → {parquet_path}\n" if parquet_path and os.path.exists(parquet_path) else ""
+        print(
+            f"\n✓ Total messages collected: {len(all_messages)}\n"
+            f"✓ Data saved:\n  JSON → {json_path}\n  CSV  → {csv_path}\n{parquet_line}"
+            f"\n{_BANNER}\nCOLLECTION COMPLETE\n{_BANNER}"
+        )
 
-        print(f"\n✓ Total messages collected: {len(all_messages)}")
-        print(f"✓ Data saved:\n  JSON → {json_path}\n  CSV  → {csv_path}")
 
-        print("\n" + "=" * 60)
-        print("COLLECTION COMPLETE")
-        print("=" * 60)
+def main():
+    asyncio.run(run())
 
 
 if __name__ == "__main__":
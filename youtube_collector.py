@@ -4,29 +4,132 @@ Collects video comments and metadata using YouTube Data API v3
 Filtered by conflict-related keywords and date range
 """
 
+import asyncio
 import os
-import json
-import pandas as pd
+import sqlite3
+import threading
 from datetime import datetime
-from typing import List, Dict
+from typing import AsyncIterator, Iterable, List, Dict, Optional, Set
+import httpx
+import httplib2
 from googleapiclient.discovery import build
 from dotenv import load_dotenv
 
+try:
+    import diskcache
+except ImportError:  # Optional: only needed for resume=True
+    diskcache = None
+
+from config.youtube import YOUTUBE_CHANNELS
+from storage import PARQUET_AVAILABLE, JsonlWriter, loads_json, read_jsonl, write_records
+
 # Load environment variables
 load_dotenv()
 API_KEY = os.getenv("YOUTUBE_API_KEY")
 
+_BANNER = "=" * 60
+
+MAX_CONCURRENCY = 8  # Videos whose comments are fetched concurrently
+SEARCH_PAGE_SIZE = 50  # search.list maxResults cap
+COMMENT_THREADS_URL = "https://www.googleapis.com/youtube/v3/commentThreads"
+# Partial response: only the parts of each thread that end up in a comment record
+COMMENT_FIELDS = (
+    "items(id,snippet(totalReplyCount,"
+    "topLevelComment/snippet(authorDisplayName,textDisplay,publishedAt,likeCount))),"
+    "nextPageToken"
+)
+SEEN_BATCH = 1000  # Comments between flushes of the stream + seen table (incremental mode)
+HTTP_TIMEOUT = 30  # Seconds, for both the discovery client and the comment client
+PAGE_CACHE_TTL = 24 * 60 * 60  # Seconds a page stays in the on-disk cache
+
+
+class _PageCache:
+    """
+    commentThreads responses keyed by (video_id, page_token), kept in an on-disk
+    diskcache at `directory` so a resumed run skips pages an interrupted one
+    already fetched. Pages are tagged with their video_id and evicted once that
+    video completes. A no-op without a directory or without diskcache.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self._disk = None
+        if directory is not None and diskcache is not None:
+            self._disk = diskcache.Cache(directory, tag_index=True)
+
+    def get(self, key) -> Optional[Dict]:
+        return self._disk.get(key) if self._disk is not None else None
+
+    def set(self, key, page: Dict):
+        if self._disk is not None:
+            self._disk.set(key, page, expire=PAGE_CACHE_TTL, tag=key[0])
+
+    def evict(self, video_id: str):
+        """Drop a completed video's pages, so later runs fetch fresh ones"""
+        if self._disk is not None:
+            self._disk.evict(video_id)
+
+
+def _build_service(api_key: str):
+    """
+    Discovery client over its own persistent httplib2.Http, so repeated calls
+    reuse one keep-alive connection instead of hanging on an unbounded socket
+    """
+    return build("youtube", "v3", developerKey=api_key,
+                 http=httplib2.Http(cache=None, timeout=HTTP_TIMEOUT))
+
 
 class YouTubeCollector:
     """Collects data (comments + metadata) from YouTube channels or videos"""
 
-    def __init__(self, api_key: str, output_dir: str = "collected_data"):
+    def __init__(self, api_key: str, output_dir: str = "collected_data",
+                 incremental: bool = False, resume: bool = False):
+        """
+        With incremental=True, collected comment_ids persist in
+        <output_dir>/seen_comments.sqlite and later runs skip them, appending
+        only new comments to the JSONL stream.
+        With resume=True (and diskcache installed), fetched pages are also kept
+        in <output_dir>/.yt_cache until their video completes, so rerunning
+        after a crash skips pages already fetched
+        """
         self.api_key = api_key
-        self.youtube = build("youtube", "v3", developerKey=api_key)
+        self.youtube = _build_service(api_key)
+        self._local = threading.local()
+        self._local.youtube = self.youtube
+        self._seen_ids: Set[str] = set()  # comment_ids already collected, across calls
         self.output_dir = output_dir
+        self._prefix = os.path.join(output_dir, "")
         os.makedirs(output_dir, exist_ok=True)
+        self._page_cache = _PageCache(os.path.join(output_dir, ".yt_cache") if resume else None)
+
+        self._seen_db = None
+        if incremental:
+            self._seen_db = sqlite3.connect(os.path.join(output_dir, "seen_comments.sqlite"))
+            self._seen_db.execute("CREATE TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY)")
+            self._seen_ids.update(row[0] for row in self._seen_db.execute("SELECT id FROM seen"))
+            print(f"↻ Incremental mode: skipping {len(self._seen_ids)} known comments")
         print("✓ Connected to YouTube Data API")
 
+    def _persist_seen(self, comment_ids: List[str]):
+        """
+        Record comment_ids in the incremental seen table (no-op otherwise)
+        """
+        if self._seen_db is not None and comment_ids:
+            with self._seen_db:
+                self._seen_db.executemany(
+                    "INSERT OR IGNORE INTO seen VALUES (?)",
+                    ((comment_id,) for comment_id in comment_ids)
+                )
+
+    @property
+    def _service(self):
+        """
+        Per-thread API client: the underlying httplib2.Http is not thread-safe
+        """
+        youtube = getattr(self._local, "youtube", None)
+        if youtube is None:
+            youtube = self._local.youtube = _build_service(self.api_key)
+        return youtube
+
     def get_channel_videos(
         self, channel_id: str, max_results: int = 50, keywords: List[str] = None,
         start_date: str = None, end_date: str = None
@@ -34,153 +137,267 @@ class YouTubeCollector:
         """
         Retrieve video IDs from a specific channel filtered by keywords and date
         """
+        video_ids = self._search_videos(channel_id, max_results, keywords, start_date, end_date)
+        print(f"✓ Found {len(video_ids)} relevant videos for channel ID: {channel_id}")
+        return video_ids
+
+    def _search_videos(self, channel_id: str, max_results: int, keywords: Optional[List[str]],
+                       start_date: Optional[str], end_date: Optional[str]) -> List[str]:
+        """
+        get_channel_videos without the status line, safe to run in a worker thread
+        """
         video_ids = []
         keywords_query = " ".join(keywords) if keywords else ""
         published_after = f"{start_date}T00:00:00Z" if start_date else None
         published_before = f"{end_date}T23:59:59Z" if end_date else None
 
-        request = self.youtube.search().list(
-            q=keywords_query,
-            channelId=channel_id,
-            part="id,snippet",
-            maxResults=max_results,
-            order="date",
-            type="video",
-            publishedAfter=published_after,
-            publishedBefore=published_before
-        )
+        page_token = None
+        while len(video_ids) < max_results:
+            # Only the ids are used, so ask for part="id" and mask everything else out
+            response = self._service.search().list(
+                q=keywords_query,
+                channelId=channel_id,
+                part="id",
+                fields="items(id/videoId),nextPageToken",
+                maxResults=min(SEARCH_PAGE_SIZE, max_results - len(video_ids)),
+                order="date",
+                type="video",
+                publishedAfter=published_after,
+                publishedBefore=published_before,
+                pageToken=page_token
+            ).execute()
 
-        response = request.execute()
-        for item in response.get("items", []):
-            video_ids.append(item["id"]["videoId"])
+            for item in response.get("items", []):
+                video_ids.append(item["id"]["videoId"])
+
+            page_token = response.get("nextPageToken")
+            if not page_token:
+                break
 
-        print(f"✓ Found {len(video_ids)} relevant videos for channel ID: {channel_id}")
         return video_ids
 
-    def get_video_comments(self, video_id: str, max_comments: int = 500) -> List[Dict]:
-        """Collect comments for a given video"""
+    async def get_video_comments(self, client: httpx.AsyncClient, video_id: str,
+                                 max_comments: int = 500) -> List[Dict]:
+        """
+        Collect comments for a given video from the commentThreads REST endpoint
+        (googleapiclient is synchronous, so pages are fetched with httpx instead)
+        """
         comments = []
+        params = {
+            "part": "snippet",
+            "videoId": video_id,
+            "maxResults": 100,
+            "textFormat": "plainText",
+            "fields": COMMENT_FIELDS,
+            "key": self.api_key
+        }
         try:
-            request = self.youtube.commentThreads().list(
-                part="snippet",
-                videoId=video_id,
-                maxResults=100,
-                textFormat="plainText"
-            )
-            while request and len(comments) < max_comments:
-                response = request.execute()
-                for item in response.get("items", []):
-                    snippet = item["snippet"]["topLevelComment"]["snippet"]
-                    comment_data = {
+            while len(comments) < max_comments:
+                key = (video_id, params.get("pageToken"))
+                response = self._page_cache.get(key)
+                if response is None:
+                    response = await client.get(COMMENT_THREADS_URL, params=params)
+                    response.raise_for_status()
+                    response = loads_json(response.content)
+                    self._page_cache.set(key, response)
+
+                # Deduplicate on insert: comments posted mid-pagination shift
+                # threads across page boundaries, and reruns revisit videos
+                seen = self._seen_ids
+                items = [item for item in response.get("items", []) if item["id"] not in seen]
+                seen.update(item["id"] for item in items)
+
+                append = comments.append
+                for item in items:
+                    thread = item["snippet"]
+                    get = thread["topLevelComment"]["snippet"].get  # One bound method per comment
+                    append({
                         "video_id": video_id,
                         "comment_id": item["id"],
-                        "author": snippet.get("authorDisplayName"),
-                        "text": snippet.get("textDisplay"),
-                        "published_at": snippet.get("publishedAt"),
-                        "like_count": snippet.get("likeCount"),
-                        "reply_count": item["snippet"].get("totalReplyCount", 0)
-                    }
-                    comments.append(comment_data)
+                        "author": get("authorDisplayName"),
+                        "text": get("textDisplay"),
+                        "published_at": get("publishedAt"),
+                        "like_count": get("likeCount"),
+                        "reply_count": thread.get("totalReplyCount", 0)
+                    })
 
                 if "nextPageToken" in response:
-                    request = self.youtube.commentThreads().list(
-                        part="snippet",
-                        videoId=video_id,
-                        maxResults=100,
-                        pageToken=response["nextPageToken"],
-                        textFormat="plainText"
-                    )
+                    params["pageToken"] = response["nextPageToken"]
                 else:
                     break
 
+            self._page_cache.evict(video_id)
             print(f"  ✓ Collected {len(comments)} comments for video {video_id}")
+        except httpx.HTTPStatusError as e:
+            # str(e) would echo the request URL, API key included
+            print(f"✗ Error fetching comments for {video_id}: HTTP {e.response.status_code}")
         except Exception as e:
             print(f"✗ Error fetching comments for {video_id}: {e}")
 
         return comments
 
-    def collect_from_channels(
+    async def _bounded_video_comments(self, client: httpx.AsyncClient, semaphore: asyncio.Semaphore,
+                                      video_id: str, max_comments: int) -> List[Dict]:
+        async with semaphore:
+            return await self.get_video_comments(client, video_id, max_comments)
+
+    async def iter_channel_comments(
         self, channel_ids: Dict[str, str], max_videos_per_channel: int = 10,
         max_comments_per_video: int = 500, keywords: List[str] = None,
         start_date: str = None, end_date: str = None
-    ) -> List[Dict]:
-        """Collect comments from multiple channels filtered by keywords and date"""
-        all_comments = []
-        for channel_name, channel_id in channel_ids.items():
-            print(f"\n📺 Collecting from {channel_name}...")
-            video_ids = self.get_channel_videos(
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield comments from multiple channels filtered by keywords and date.
+        The per-channel video searches run concurrently in worker threads; each
+        video's comment pages are then fetched over one HTTP/2 client, at most
+        MAX_CONCURRENCY videos at a time. Comments are yielded in channel/video
+        order as each video completes, so nothing beyond the in-flight videos is held.
+        This is an async generator; to save with constant memory, stream it to
+        JSONL via collect_from_channels(stream_filename=...) and pass
+        storage.read_jsonl(...) to save_data.
+        """
+        # Searches are independent, so start them all before any comment fetch.
+        # Status lines are printed here, in channel order, not from the threads.
+        searches = [
+            (channel_name, channel_id, asyncio.ensure_future(asyncio.to_thread(
+                self._search_videos,
                 channel_id,
-                max_results=max_videos_per_channel,
-                keywords=keywords,
-                start_date=start_date,
-                end_date=end_date
-            )
-
-            for vid in video_ids:
-                video_comments = self.get_video_comments(vid, max_comments_per_video)
-                for c in video_comments:
-                    c["channel_name"] = channel_name
-                all_comments.extend(video_comments)
-
-        print(f"\n✓ Total comments collected: {len(all_comments)}")
+                max_videos_per_channel,
+                keywords,
+                start_date,
+                end_date
+            )))
+            for channel_name, channel_id in channel_ids.items()
+        ]
+
+        semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+        limits = httpx.Limits(max_connections=MAX_CONCURRENCY)
+        pending = []
+        async with httpx.AsyncClient(http2=True, timeout=HTTP_TIMEOUT, limits=limits) as client:
+            try:
+                for channel_name, channel_id, search in searches:
+                    video_ids = await search
+                    print(f"\n📺 Collecting from {channel_name}...\n"
+                          f"✓ Found {len(video_ids)} relevant videos for channel ID: {channel_id}")
+                    pending.extend(
+                        (channel_name, asyncio.ensure_future(self._bounded_video_comments(
+                            client, semaphore, vid, max_comments_per_video
+                        )))
+                        for vid in video_ids
+                    )
+
+                for channel_name, task in pending:
+                    for c in await task:
+                        c["channel_name"] = channel_name
+                        yield c
+            finally:
+                # The consumer may stop early; don't leave fetches running
+                for *_, task in searches + pending:
+                    task.cancel()
+
+    async def collect_from_channels(
+        self, channel_ids: Dict[str, str], max_videos_per_channel: int = 10,
+        max_comments_per_video: int = 500, keywords: List[str] = None,
+        start_date: str = None, end_date: str = None, stream_filename: str = None
+    ) -> Iterable[Dict]:
+        """
+        Collect comments from multiple channels filtered by keywords and date.
+        Returns the comments as a list, or, if stream_filename is given, writes
+        them only to <output_dir>/<stream_filename>.jsonl as each video completes
+        (constant memory; appended to in incremental mode, so the file accumulates
+        across runs) and returns a lazy reader over that file.
+        """
+        all_comments: Optional[List[Dict]] = None if stream_filename else []
+        total = 0
+        pending_ids: List[str] = []
+        comments = self.iter_channel_comments(
+            channel_ids, max_videos_per_channel, max_comments_per_video,
+            keywords, start_date, end_date
+        )
+        stream = None
+        try:
+            if stream_filename:
+                stream = JsonlWriter(f"{self._prefix}{stream_filename}.jsonl",
+                                     append=self._seen_db is not None)
+            async for c in comments:
+                total += 1
+                if stream is not None:
+                    stream.write(c)
+                else:
+                    all_comments.append(c)
+                pending_ids.append(c["comment_id"])
+                if len(pending_ids) >= SEEN_BATCH:
+                    if stream is not None:
+                        stream.flush()
+                    self._persist_seen(pending_ids)
+                    pending_ids = []
+        finally:
+            if stream is not None:
+                stream.close()
+            # Only ids that reached the stream/result are marked seen, so an
+            # interrupted run re-fetches (rather than loses) the rest
+            self._persist_seen(pending_ids)
+
+        print(f"\n✓ Total comments collected: {total}")
+        if stream is not None:
+            return read_jsonl(stream.path)
         return all_comments
 
-    def save_data(self, data: List[Dict], filename: str = None):
-        """Save collected data as JSON and CSV"""
+    def save_data(self, data: Iterable[Dict], filename: str = None,
+                  also_write_text: bool = True, compress: bool = False):
+        """
+        Save collected data as JSON and CSV, plus Parquet when pyarrow is installed (streamed).
+        With also_write_text=False only the Parquet file is written, which requires pyarrow;
+        compress=True gzips the JSON to <filename>.json.gz.
+        """
         if not filename:
             filename = f"youtube_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
 
-        json_path = os.path.join(self.output_dir, f"{filename}.json")
-        csv_path = os.path.join(self.output_dir, f"{filename}.csv")
+        base = self._prefix + filename
+        json_path = (base + (".json.gz" if compress else ".json")) if also_write_text else None
+        csv_path = base + ".csv" if also_write_text else None
+        parquet_path = base + ".parquet" if PARQUET_AVAILABLE or not also_write_text else None
 
-        with open(json_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
-
-        pd.DataFrame(data).to_csv(csv_path, index=False, encoding="utf-8")
-        print(f"\n✓ Data saved:")
-        print(f"  JSON → {json_path}")
-        print(f"  CSV  → {csv_path}")
-        print(f"  Total comments: {len(data)}")
+        total = write_records(data, json_path, csv_path, parquet_path)
+        print("\n✓ Data saved:")
+        if also_write_text:
+            print(f"  JSON → {json_path}\n  CSV  → {csv_path}")
+        if parquet_path and os.path.exists(parquet_path):
+            print(f"  Parquet → {parquet_path}")
+        print(f"  Total comments: {total}")
 
 
 def main():
     """Collect YouTube comments on Israel–Hamas War from news channels"""
-    print("=" * 60)
-    print("YOUTUBE DATA COLLECTION (Keyword + Date Filter)")
-    print("=" * 60)
+    print(f"{_BANNER}\nYOUTUBE DATA COLLECTION (Keyword + Date Filter)\n{_BANNER}")
 
     collector = YouTubeCollector(API_KEY)
 
-    CHANNEL_IDS = {
-        "BBC": "UC16niRr50-MSBwiO3YDb3RA",
-        "Aljazeera": "UCNye-wNBqNL5ZzHSJj3l8Bg",
-        "CNN": "UCupvZG-5ko_eiXAupbDfxWw",
-        "WION": "UC_gUM8rL-Lrg6O3adPW9K1g",
-        "Reuters": "UCZLZ8Jjx_RN2CXloOmgTHVg"
-    }
-
     KEYWORDS = ["Israel", "Hamas", "Gaza", "Palestine", "conflict", "war"]
     START_DATE = "2023-10-07"
     END_DATE = "2025-01-20"
 
-    comments = collector.collect_from_channels(
-        channel_ids=CHANNEL_IDS,
+    FILENAME = "youtube_israel_palestine"
+
+    asyncio.run(collector.collect_from_channels(
+        channel_ids=YOUTUBE_CHANNELS,
         max_videos_per_channel=10,
         max_comments_per_video=500,
         keywords=KEYWORDS,
         start_date=START_DATE,
-        end_date=END_DATE
-    )
+        end_date=END_DATE,
+        stream_filename=FILENAME
+    ))
 
-    collector.save_data(comments, filename="youtube_israel_palestine")
+    # Save from the JSONL just streamed, so the corpus is never held in memory
+    collector.save_data(read_jsonl(os.path.join(collector.output_dir, f"{FILENAME}.jsonl")),
+                        filename=FILENAME)
 
-    print("\n" + "=" * 60)
-    print("COLLECTION COMPLETE")
-    print("=" * 60)
+    print(f"\n{_BANNER}\nCOLLECTION COMPLETE\n{_BANNER}")
 
 
 if __name__ == "__main__":
     # Before running:
-    # pip install google-api-python-client python-dotenv pandas
+    # pip install google-api-python-client python-dotenv
     # and create a .env file with: YOUTUBE_API_KEY=your_api_key
     main()